@@ -1,7 +1,10 @@
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
 from qiskit import QuantumCircuit
 from qiskit.converters import circuit_to_dag
+from interaction_builder import extract_pairs
+from topology import COUPLING_GRAPH
 
 # Step 1: Define the quantum circuit
 qc = QuantumCircuit(4)
@@ -18,28 +21,16 @@ qc.measure_all()
 dag = circuit_to_dag(qc)
 
 # Extract the interaction graph with edge weights (gate numbers)
-interaction_edges = []  # Store edges as pairs of qubits with gate numbers
-first_interaction = {}  # Store the first gate number for each pair of qubits
-
-# Iterate through the DAG and track the gate numbers
-for gate_number, gate in enumerate(dag.two_qubit_ops()):  # Consider only two-qubit operations
-    qubits = [q._index for q in gate.qargs]  # Use _index to access qubit index
-    qubit_pair = tuple(sorted(qubits))  # Sort qubits to ensure (q1, q2) is the same as (q2, q1)
-    
-    # If the pair has not been seen before, record the first gate number
-    if qubit_pair not in first_interaction:
-        first_interaction[qubit_pair] = gate_number
-    
-    # Append the edge with the gate number (weight)
-    interaction_edges.append((qubits[0], qubits[1], first_interaction[qubit_pair]))  # Use the first gate number
+# Each edge is a pair of qubits with the gate number of that pair's first interaction
+pairs, first_gate = extract_pairs(dag)
 
 # Create an undirected graph for the interaction
 Gd = nx.Graph()
 
-# Add edges to the graph with weights (gate numbers)
-for edge in interaction_edges:
-    qubit1, qubit2, gate_number = edge
-    Gd.add_edge(qubit1, qubit2, weight=gate_number)
+# Add each pair once, at its first interaction, with the gate number as weight
+first_rows = np.flatnonzero(first_gate == np.arange(len(first_gate)))
+Gd.add_weighted_edges_from(zip(pairs[first_rows, 0].tolist(), pairs[first_rows, 1].tolist(),
+                               first_gate[first_rows].tolist()))
 
 # Find the center of the graph
 centers = nx.center(Gd)
@@ -54,29 +45,8 @@ bfs_traversal = [center] + [v for u, v in bfs_edges]
 print("Center of the Graph:", center)
 print("BFS Traversal:", bfs_traversal)
 
-# adding the coupling graph
-coupling_graph = {
-    'Q0': ['Q1','Q5'],  
-    'Q1': ['Q0','Q2','Q6','Q7'],  
-    'Q2': ['Q1','Q3','Q6','Q7'],       
-    'Q3': ['Q2','Q4','Q8','Q9'],  
-    'Q4': ['Q3','Q8','Q9'],  
-    'Q5': ['Q0','Q6','Q10','Q11'], 
-    'Q6': ['Q1','Q2','Q5','Q7','Q10','Q11'],  
-    'Q7': ['Q1','Q2','Q6','Q8','Q12','Q13'],  
-    'Q8': ['Q3','Q4','Q7','Q9','Q12','Q13'], 
-    'Q9': ['Q3','Q4','Q8','Q14'] ,
-    'Q10': ['Q5','Q6','Q11','Q15'],  
-    'Q11': ['Q5','Q6','Q10','Q12','Q16','Q17'],  
-    'Q12': ['Q7','Q8','Q11','Q13','Q16','Q17'],       
-    'Q13': ['Q7','Q8','Q12','Q14','Q18','Q19'],  
-    'Q14': ['Q9','Q13','Q18','Q19'],  
-    'Q15': ['Q10','Q16'], 
-    'Q16': ['Q11','Q12','Q15','Q17'],  
-    'Q17': ['Q11','Q12','Q16','Q18'],  
-    'Q18': ['Q13','Q14','Q17','Q19'], 
-    'Q19': ['Q13','Q14','Q18']        
-}
+# adding the coupling graph (shared with the other scripts through topology.py)
+coupling_graph = COUPLING_GRAPH
 
 
 Gc = nx.Graph(coupling_graph)
@@ -1,6 +1,8 @@
-import networkx as nx
 from qiskit import QuantumCircuit
 from qiskit.converters import circuit_to_dag
+from interaction_builder import extract_pairs, build_interaction_graph
+from topology import analyze_graph, describe, qubit_id
+import numpy as np
 import json
 
 def read_circuit_from_file(filename):
@@ -27,19 +29,43 @@ def read_coupling_from_file(filename):
         coupling_data = json.load(f)
     return coupling_data
 
-def get_qubit_index(node):
+def interaction_neighbors(Gd, node):
     """
-    Extract numeric index from qubit label (e.g., 'Q7' -> 7)
+    Return the neighbors of an interaction graph node ordered by their first interaction.
     """
-    return int(node.replace('Q', ''))
+    adjacency = Gd.adj(node)
+    return sorted(adjacency, key=adjacency.__getitem__)
 
-def find_center_with_max_degree(G):
+def bfs_order(adjacency, source):
     """
-    Find center nodes and return the one with maximum degree.
+    Breadth-first traversal starting at source over precomputed adjacency lists,
+    indexed by node 0..n-1. Returns the visit order as an int32 array.
+    Neighbors are visited in the order their adjacency lists give.
+    """
+    order = np.empty(len(adjacency), dtype=np.int32)
+    seen = np.zeros(len(adjacency), dtype=np.bool_)
+    order[0] = source
+    seen[source] = True
+    head, tail = 0, 1
+    while head < tail:
+        u = order[head]
+        head += 1
+        for v in adjacency[u]:
+            if not seen[v]:
+                seen[v] = True
+                order[tail] = v
+                tail += 1
+    return order[:tail]
+
+def find_center_with_max_degree(G, centers=None):
+    """
+    Find center nodes and return the index of the one with maximum degree.
     If there's a tie in degree, return the one with minimum qubit index.
-    Handles both string labels ('Q0', 'Q1', etc.) and integer nodes.
+    Handles both string labels ('Q0', 'Q1', etc.) and integer node payloads.
+    Precomputed center indices (see analyze_graph) can be passed in to skip recomputing them.
     """
-    centers = nx.center(G)
+    if centers is None:
+        centers = analyze_graph(G)['centers']
     # Get degrees of center nodes
     center_degrees = {node: G.degree(node) for node in centers}
     # Find maximum degree among centers
@@ -48,92 +74,84 @@ def find_center_with_max_degree(G):
     max_degree_centers = [node for node, degree in center_degrees.items() 
                          if degree == max_degree]
     
-    # Check if nodes are strings (coupling graph) or integers (interaction graph)
-    if isinstance(max_degree_centers[0], str):
-        # For coupling graph (nodes are strings like 'Q0', 'Q1')
-        return min(max_degree_centers, key=lambda x: int(x.replace('Q', '')))
+    # Check if payloads are strings (coupling graph) or integers (interaction graph)
+    if isinstance(G[max_degree_centers[0]], str):
+        # For coupling graph (payloads are strings like 'Q0', 'Q1')
+        return min(max_degree_centers, key=lambda x: qubit_id(G[x]))
     else:
-        # For interaction graph (nodes are integers)
-        return min(max_degree_centers)
+        # For interaction graph (payloads are integers)
+        return min(max_degree_centers, key=lambda x: G[x])
 
 def get_qubit_mapping(qc, coupling_graph):
     """
     Generate qubit mapping for the given quantum circuit and coupling graph.
     """
     dag = circuit_to_dag(qc)
-    interaction_edges = []
-    first_interaction = {}
-
-    for gate_number, gate in enumerate(dag.two_qubit_ops()):
-        qubits = [q._index for q in gate.qargs]
-        qubit_pair = tuple(sorted(qubits))
-        
-        if qubit_pair not in first_interaction:
-            first_interaction[qubit_pair] = gate_number
-        
-        interaction_edges.append((qubits[0], qubits[1], first_interaction[qubit_pair]))
+    pairs, first_gate = extract_pairs(dag)
 
-    # Create interaction graph (Gd)
-    Gd = nx.Graph()
-    for edge in interaction_edges:
-        qubit1, qubit2, gate_number = edge
-        Gd.add_edge(qubit1, qubit2, weight=gate_number)
+    # Create interaction graph (Gd); node payloads are the logical qubits
+    Gd = build_interaction_graph(pairs, first_gate)
 
     # Create coupling graph (Gc)
-    Gc = nx.Graph(coupling_graph)
+    coupling_topology = describe(coupling_graph)
+    Gc = coupling_topology['graph']
 
-    if len(Gc) < qc.num_qubits:
-        raise ValueError(f"Coupling graph has fewer qubits ({len(Gc)}) than required by the circuit ({qc.num_qubits})")
+    if Gc.num_nodes() < qc.num_qubits:
+        raise ValueError(f"Coupling graph has fewer qubits ({Gc.num_nodes()}) than required by the circuit ({qc.num_qubits})")
 
     # Find centers with maximum degree
     interaction_center = find_center_with_max_degree(Gd)
-    coupling_center = find_center_with_max_degree(Gc)
+    coupling_center = find_center_with_max_degree(Gc, coupling_topology['centers'])
 
     # Print detailed center analysis
     print(f"\nCoupling Graph Centers Analysis:")
-    centers = nx.center(Gc)
+    centers = coupling_topology['centers']
     print("All centers and their degrees:")
     for center in centers:
-        print(f"Center: {center}, Degree: {Gc.degree(center)}")
-    print(f"Selected center: {coupling_center} (Degree: {Gc.degree(coupling_center)})")
+        print(f"Center: {Gc[center]}, Degree: {Gc.degree(center)}")
+    print(f"Selected center: {Gc[coupling_center]} (Degree: {Gc.degree(coupling_center)})")
 
     print(f"\nInteraction Graph Center Analysis:")
-    print(f"Selected center: {interaction_center}")
+    print(f"Selected center: {Gd[interaction_center]}")
     print(f"Degree: {Gd.degree(interaction_center)}")
 
+    # Neighbor lists of both graphs, computed once instead of on every mapping step
+    Gd_adj = [interaction_neighbors(Gd, node) for node in Gd.node_indices()]
+    Gc_adj = {node: sorted(Gc.neighbors(node)) for node in Gc.node_indices()}
+
     # BFS traversal of interaction graph
-    bfs_edges = list(nx.bfs_edges(Gd, interaction_center))
-    bfs_traversal = [interaction_center] + [v for u, v in bfs_edges]
+    bfs_traversal = bfs_order(Gd_adj, interaction_center)
 
-    # Initialize mapping
+    # Initialize mapping (Gd node index -> Gc node index)
     mapping = {}
     mapped_qubits = set()
 
     mapping[interaction_center] = coupling_center
     mapped_qubits.add(coupling_center)
 
-    queue = bfs_traversal.copy()
-    queue.pop(0)
+    # Shortest path distances between all physical qubits, computed once per topology
+    distances = coupling_topology['distances']
 
-    while queue:
-        p = queue.pop(0)
-        ref_locs = [neighbor for neighbor in Gd.neighbors(p) if neighbor in mapping]
-        candi_locs = [neighbor for neighbor in Gc.neighbors(mapping[ref_locs[0]]) 
+    # Walk the BFS order after the (already mapped) center
+    for p in bfs_traversal[1:].tolist():
+        ref_locs = [neighbor for neighbor in Gd_adj[p] if neighbor in mapping]
+        candi_locs = [neighbor for neighbor in Gc_adj[mapping[ref_locs[0]]]
                      if neighbor not in mapped_qubits]
 
         for ref in ref_locs[1:]:
-            candi_locs.sort(key=lambda x: nx.shortest_path_length(Gc, source=mapping[ref], target=x))
+            candi_locs.sort(key=distances[mapping[ref]].__getitem__)
             candi_locs = candi_locs[:1]
 
         if len(candi_locs) == 1:
             mapping[p] = candi_locs[0]
             mapped_qubits.add(candi_locs[0])
         else:
-            selected = max(candi_locs, key=lambda x: Gc.degree[x])
+            selected = max(candi_locs, key=Gc.degree)
             mapping[p] = selected
             mapped_qubits.add(selected)
 
-    return mapping
+    # Translate node indices back to logical qubits and physical qubit labels
+    return {Gd[p]: Gc[phys] for p, phys in mapping.items()}
 
 def main():
     try:
@@ -0,0 +1,47 @@
+import numpy as np
+import rustworkx as rx
+
+def extract_pairs(dag):
+    """
+    Extract the qubit pairs of all two-qubit operations in a DAG, in gate order.
+    Returns a (G, 2) int32 array of [qubit1, qubit2] rows and a (G,) int32 array
+    holding, for each row, the gate number at which that qubit pair first interacts.
+    """
+    ops = list(dag.two_qubit_ops())
+    # Both qubit indices of every two-qubit gate
+    pairs = np.array([(qargs[0]._index, qargs[1]._index) for qargs in (gate.qargs for gate in ops)],
+                     dtype=np.int32).reshape(-1, 2)
+    if len(pairs) == 0:
+        return pairs, np.empty(0, dtype=np.int32)
+
+    # Encode each unordered pair as min * N + max so (q1, q2) and (q2, q1) share a key
+    n = int(pairs.max()) + 1
+    keys = pairs.min(axis=1).astype(np.int64) * n + pairs.max(axis=1)
+
+    # First occurrence of every key, fanned back out to the rows that share it
+    _, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    first_gate = first_index[inverse.ravel()].astype(np.int32)
+    return pairs, first_gate
+
+def build_interaction_graph(pairs, first_gate):
+    """
+    Build the interaction graph (Gd) from extract_pairs output.
+    Node payloads are the logical qubits in order of first appearance, and edge
+    weights are the gate number of each pair's first interaction.
+    """
+    flat = pairs.ravel()
+    _, first_seen = np.unique(flat, return_index=True)
+    qubits = flat[np.sort(first_seen)]
+
+    # Logical qubit -> node index lookup table
+    index = np.empty(int(flat.max()) + 1 if len(flat) else 0, dtype=np.int32)
+    index[qubits] = np.arange(len(qubits), dtype=np.int32)
+
+    # Only a pair's first interaction adds an edge; later rows would just repeat it
+    first_rows = np.flatnonzero(first_gate == np.arange(len(first_gate)))
+    edges = index[pairs[first_rows]]
+
+    Gd = rx.PyGraph(multigraph=False)
+    Gd.add_nodes_from(qubits.tolist())
+    Gd.add_edges_from(list(zip(edges[:, 0].tolist(), edges[:, 1].tolist(), first_gate[first_rows].tolist())))
+    return Gd
@@ -1,7 +1,11 @@
-import networkx as nx
+import rustworkx as rx
+from rustworkx.visualization import mpl_draw
 from qiskit import QuantumCircuit
 from qiskit.converters import circuit_to_dag
+from interaction_builder import extract_pairs
+from topology import analyze_graph
 import json
+from collections import Counter
 import matplotlib.pyplot as plt
 
 def read_circuit_from_file(filename):
@@ -24,38 +28,28 @@ def generate_interaction_graph(qc):
     Generate interaction graph from quantum circuit.
     Returns the graph and detailed interaction information.
     """
-    # Convert circuit to DAG
+    # Convert circuit to DAG and extract the qubit pair of every two-qubit gate
     dag = circuit_to_dag(qc)
+    pairs, first_gate = extract_pairs(dag)
 
     # Track interactions and their first occurrence
-    interaction_edges = []
     first_interaction = {}
-    edge_counts = {}  # Track number of interactions between each pair
+    edge_counts = Counter()  # Track number of interactions between each pair
 
-    # Process all two-qubit gates
-    for gate_number, gate in enumerate(dag.two_qubit_ops()):
-        qubits = [q._index for q in gate.qargs]
-        qubit_pair = tuple(sorted(qubits))
-        
-        # Track first interaction
-        if qubit_pair not in first_interaction:
-            first_interaction[qubit_pair] = gate_number
-        
-        # Count interactions
-        if qubit_pair not in edge_counts:
-            edge_counts[qubit_pair] = 0
+    # Process all two-qubit gates; first_gate already holds each pair's first interaction
+    for (qubit1, qubit2), gate_number in zip(pairs.tolist(), first_gate.tolist()):
+        qubit_pair = (qubit1, qubit2) if qubit1 < qubit2 else (qubit2, qubit1)
+        first_interaction.setdefault(qubit_pair, gate_number)
         edge_counts[qubit_pair] += 1
-        
-        interaction_edges.append((qubits[0], qubits[1], first_interaction[qubit_pair]))
 
-    # Create interaction graph
-    G = nx.Graph()
+    # Create interaction graph; node payloads are the logical qubits in order of first appearance
+    G = rx.PyGraph(multigraph=False)
+    index = {q: G.add_node(q) for q in dict.fromkeys(pairs.ravel().tolist())}
     
-    # Add edges with weights being the first interaction number
-    for edge in interaction_edges:
-        qubit1, qubit2, gate_number = edge
-        if not G.has_edge(qubit1, qubit2):
-            G.add_edge(qubit1, qubit2, weight=gate_number, count=edge_counts[tuple(sorted([qubit1, qubit2]))])
+    # Add one edge per pair in a single call, weighted by the first interaction number
+    G.add_edges_from([(index[qubit_pair[0]], index[qubit_pair[1]],
+                       {'weight': gate_number, 'count': edge_counts[qubit_pair]})
+                      for qubit_pair, gate_number in first_interaction.items()])
 
     return G, first_interaction, edge_counts
 
@@ -63,23 +57,27 @@ def analyze_interaction_graph(G):
     """
     Analyze properties of the interaction graph.
     """
-    # Find centers
-    centers = nx.center(G)
+    # Find centers (nodes of minimum eccentricity)
+    graph_analysis = analyze_graph(G)
+    centers = [G[node] for node in graph_analysis['centers']]
     
     # Get center with maximum degree
-    center_degrees = {node: G.degree(node) for node in centers}
+    index = {G[node]: node for node in G.node_indices()}
+    center_degrees = {node: G.degree(index[node]) for node in centers}
     max_degree = max(center_degrees.values())
     max_degree_centers = [node for node, degree in center_degrees.items() 
                          if degree == max_degree]
     selected_center = min(max_degree_centers)
 
+    # Derive the remaining metrics from the same distance matrix
+    n = G.num_nodes()
     return {
         'centers': centers,
         'selected_center': selected_center,
         'center_degrees': center_degrees,
-        'diameter': nx.diameter(G),
-        'average_shortest_path': nx.average_shortest_path_length(G),
-        'density': nx.density(G)
+        'diameter': graph_analysis['diameter'],
+        'average_shortest_path': graph_analysis['distances'].sum() / (n * (n - 1)) if n > 1 else 0,
+        'density': 2 * G.num_edges() / (n * (n - 1)) if n > 1 else 0
     }
 
 def visualize_interaction_graph(G, analysis):
@@ -87,31 +85,23 @@ def visualize_interaction_graph(G, analysis):
     Create visualization of the interaction graph.
     """
     plt.figure(figsize=(10, 8))
-    pos = nx.spring_layout(G, k=1)
-    
-    # Draw nodes
-    nx.draw_networkx_nodes(G, pos, node_color='lightblue', 
-                          node_size=500)
-    
-    # Highlight center nodes
-    nx.draw_networkx_nodes(G, pos, 
-                          nodelist=analysis['centers'],
-                          node_color='lightgreen',
-                          node_size=500)
-    
-    # Highlight selected center
-    nx.draw_networkx_nodes(G, pos,
-                          nodelist=[analysis['selected_center']],
-                          node_color='red',
-                          node_size=500)
+    pos = rx.spring_layout(G, k=1)
     
-    # Draw edges with weights
-    nx.draw_networkx_edges(G, pos)
+    # Color nodes: selected center red, other centers green, the rest blue
+    centers = set(analysis['centers'])
+    node_color = []
+    for node in G.node_indices():
+        if G[node] == analysis['selected_center']:
+            node_color.append('red')
+        elif G[node] in centers:
+            node_color.append('lightgreen')
+        else:
+            node_color.append('lightblue')
     
-    # Add labels
-    nx.draw_networkx_labels(G, pos)
-    edge_labels = nx.get_edge_attributes(G, 'count')
-    nx.draw_networkx_edge_labels(G, pos, edge_labels)
+    # Draw nodes, edges, and labels, with interaction counts on the edges
+    mpl_draw(G, pos, node_color=node_color, node_size=500,
+             with_labels=True, labels=str,
+             edge_labels=lambda edge: str(edge['count']))
     
     plt.title("Quantum Circuit Interaction Graph")
     plt.axis('off')
@@ -131,8 +121,8 @@ def main():
         
         # Print analysis results
         print("\nInteraction Graph Analysis:")
-        print(f"Number of qubits: {G.number_of_nodes()}")
-        print(f"Number of interactions: {G.number_of_edges()}")
+        print(f"Number of qubits: {G.num_nodes()}")
+        print(f"Number of interactions: {G.num_edges()}")
         print("\nCenter Analysis:")
         print(f"All centers: {analysis['centers']}")
         print("Center degrees:")
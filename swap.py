@@ -1,189 +1,199 @@
-import networkx as nx
+import numpy as np
+from array import array
 from qiskit import QuantumCircuit
 from qiskit.converters import circuit_to_dag
-from collections import defaultdict, deque
+from topology import COUPLING_GRAPH, describe
 # define a gate
 class Gate:
-    def __init__(self, control, target):
+    # gid: dense per-circuit gate number, usable as a bit or array index instead of hashing the gate
+    __slots__ = ("control", "target", "gid")
+    
+    def __init__(self, control, target, gid):
         self.control = control
         self.target = target
+        self.gid = gid
 
 class DependenceList:
+    # list plus a head index: cheaper than a deque for the few gates each qubit holds
+    __slots__ = ("gates", "head_idx")
+    
     def __init__(self):
-        self.gates = deque()
+        self.gates = []
+        self.head_idx = 0
     
     def push_back(self, gate):
         self.gates.append(gate)
     
     def pop_front(self):
-        return self.gates.popleft() if self.gates else None
+        if self.head_idx >= len(self.gates):
+            return None
+        gate = self.gates[self.head_idx]
+        self.head_idx += 1
+        # drop the consumed prefix once it is more than half the list
+        if self.head_idx * 2 > len(self.gates):
+            del self.gates[:self.head_idx]
+            self.head_idx = 0
+        return gate
     
     def head(self):
-        return self.gates[0] if self.gates else None
+        return self.gates[self.head_idx] if self.head_idx < len(self.gates) else None
 
-def calculate_mcpe_cost(swap, active_gates, current_mapping, distances):
-    p1, p2 = swap
-    score = 0
+def calculate_mcpe_costs(swap_perm, active_gates, log2phys, distances):
+    # Scores every candidate swap against all active gates in one vectorized pass
+    # swap_perm: (K, N) rows giving the physical qubit each physical qubit lands on after the candidate swap
+    # physical endpoints of the active gates before swap
+    pc = np.fromiter((log2phys[gate.control] for gate in active_gates), np.intp, len(active_gates))
+    pt = np.fromiter((log2phys[gate.target] for gate in active_gates), np.intp, len(active_gates))
+    # endpoints after each swap: one gather per side instead of comparing against p1 and p2, shape (K, |act_list|)
+    new_pc = swap_perm[:, pc]
+    new_pt = swap_perm[:, pt]
     
-    temp_mapping = current_mapping.copy()
-    for q in temp_mapping:
-        if temp_mapping[q] == p1:
-            temp_mapping[q] = p2
-        elif temp_mapping[q] == p2:
-            temp_mapping[q] = p1
-    
-    for gate in active_gates:
-        # old_dist: before swap the distance between physical qubits 
-        old_dist = distances[current_mapping[gate.control]][current_mapping[gate.target]]
-          # new_dist: after swap the distance between physical qubits 
-        new_dist = distances[temp_mapping[gate.control]][temp_mapping[gate.target]]
-        # score denotes the mcpe of swap
-        score += old_dist - new_dist
-    return score
-
-def check_connectivity(gate, current_mapping, coupling_graph):
-    pos1 = current_mapping[gate.control]
-    pos2 = current_mapping[gate.target]
-    node1 = f'Q{pos1}'
-    node2 = f'Q{pos2}'
-    # returns 1 if there is an edge between node 1 and node 2 in the coupling graph. else returns 0.  
-    return node2 in coupling_graph[node1]
+    # old_dist: before swap the distance between physical qubits 
+    old_dist = distances[pc, pt]
+    # new_dist: after swap the distance between physical qubits
+    new_dist = distances[new_pc, new_pt]
+    # score denotes the mcpe of each swap
+    return (old_dist.astype(np.int32) - new_dist).sum(axis=1)
 
-def get_reverse_mapping(mapping):
-    return {v: k for k, v in mapping.items()}
+def check_connectivity(gate, log2phys, adj):
+    # returns 1 if there is an edge between the physical qubits of the gate in the coupling graph. else returns 0.  
+    return log2phys[gate.target] in adj[log2phys[gate.control]]
 
-def schedule_quantum_circuit(coupling_graph, initial_mapping, num_qubits=20):
+def schedule_quantum_circuit(coupling_graph, initial_mapping, num_qubits=20, decay_delta=0.001):
     #initialised the final circuit
     final_cir = QuantumCircuit(6)
-    current_mapping = initial_mapping.copy()
-    #fron_list : tracks gates waiting to be scheduled
-    #act_list : tracks gates currently being scheduled
-    #frozen : tracks logical qubits which have been processed 0 means unfrozen 1 means frozen
-    fron_list = []
-    act_list = []
-    frozen = {q: False for q in range(num_qubits)}
+    #fron_list : bitmask of gates waiting to be scheduled, bit gate.gid set while the gate waits
+    #act_list : tracks gates currently being scheduled; a dict used as an insertion-ordered set
+    #frozen : bitmask of logical qubits which have been processed, bit q set means qubit q is frozen
+    fron_list = 0
+    act_list = {}
+    frozen = 0
     executed_gates = []  # Track executed gates order
     
-    #  dependence lists
-    dlist = defaultdict(DependenceList)
+    #  dependence lists, indexed by logical qubit
+    dlist = [DependenceList() for _ in range(num_qubits)]
     gates = [(0, 2), (5, 2), (0, 5), (4, 0), (0, 3), (5, 0), (3, 1)]
-    for c, t in gates:
-        gate = Gate(c, t)
+    for gid, (c, t) in enumerate(gates):
+        gate = Gate(c, t, gid)
         dlist[c].push_back(gate)
         dlist[t].push_back(gate)
     
-    # Computes distances between nodes in coupling graph 
-    distances = [[float('inf')] * num_qubits for _ in range(num_qubits)]
-    for node, neighbors in coupling_graph.items():
-        i = int(node[1:])
-        distances[i][i] = 0
-        for neighbor in neighbors:
-            j = int(neighbor[1:])
-            distances[i][j] = distances[j][i] = 1
+    # The coupling graph is static: its integer adjacency, edges and distances are precomputed (and cached) by topology.py
+    topology = describe(coupling_graph)
+    # adj[i] is the set of physical qubits coupled to physical qubit i
+    adj = topology['adjacency']
+    #candi_list contains every coupling graph edge (i, j) with i < j as a candidate SWAP
+    candi_list = topology['edges']
+    # shortest path distances between nodes in coupling graph 
+    distances = topology['distances']
     
-    # Stores operations for later conversion
-    operations = []
+    # swap_perm[k]: permutation of physical qubits applied by candi_list[k], built once per topology for the vectorized scorer
+    swap_perm = topology['swap_perm']
+    # incident[p]: indices into candi_list of the edges touching physical qubit p
+    incident = topology['incident']
+    # candidate swap endpoints as rows, to look up the logical qubits a swap would move
+    ends = np.array(candi_list, dtype=np.intp).reshape(-1, 2)
+    
+    # decay[q]: SABRE-style penalty on logical qubit q, raised by decay_delta whenever q is swapped
+    # and reset once a gate executes, so the scheduler does not keep swapping the same qubits back
+    # and forth; the extra last slot stands for an empty physical qubit (-1) and stays 1
+    decay = np.ones(num_qubits + 1)
+    
+    # log2phys: physical qubit of each logical qubit (-1 if unmapped)
+    # phys2log: logical qubit on each physical qubit (-1 if empty)
+    # both are plain lists updated together on every SWAP
+    log2phys = [-1] * num_qubits
+    phys2log = [-1] * len(adj)
+    for q, p in initial_mapping.items():
+        log2phys[q] = p
+        phys2log[p] = q
+    
+    # Stores operations for later conversion as parallel typed arrays (kind 0 = cx, 1 = swap)
+    # so recording a gate allocates no tuple
+    op_kind = array('b')
+    op_q1 = array('i')
+    op_q2 = array('i')
     
     while True:
         
         for q in range(6):
-            if not frozen[q]:
+            if not frozen & (1 << q):
                 gate = dlist[q].head()
                 if gate:
-                    if gate in fron_list:
-                        fron_list.remove(gate)
-                        if gate not in act_list:
-                            act_list.append(gate)
+                    if fron_list >> gate.gid & 1:
+                        fron_list &= ~(1 << gate.gid)
+                        act_list[gate] = None
                     else:
-                        if gate not in fron_list:
-                            fron_list.append(gate)
-                    frozen[q] = True
+                        fron_list |= 1 << gate.gid
+                    frozen |= 1 << q
         
         # Execute gates that are satisfying connectivity constraint
-        gates_to_remove = []
-        for gate in act_list:
-            if check_connectivity(gate, current_mapping, coupling_graph):
-                gates_to_remove.append(gate)
+        for gate in list(act_list):
+            if check_connectivity(gate, log2phys, adj):
+                del act_list[gate]
                 dlist[gate.control].pop_front()
                 dlist[gate.target].pop_front()
                 # Store gate operation with logical qubits
-                operations.append(('cx', gate.control, gate.target))
+                op_kind.append(0)
+                op_q1.append(gate.control)
+                op_q2.append(gate.target)
                 executed_gates.append(gate)
-                frozen[gate.control] = False
-                frozen[gate.target] = False
+                decay.fill(1)
+                frozen &= ~((1 << gate.control) | (1 << gate.target))
         
-        for gate in gates_to_remove:
-            act_list.remove(gate)
-        # repeat till fron_list is empty
+        # repeat till every dependence list is empty
         
             
         # SWAP selection
         # Now act_list containes gates which donot satisfy the connectivity constraint.
         if act_list:
-            candi_list = []
-        #candi_list contains SWAPs having positive effect on at least one active gate;    
-            for node, neighbors in coupling_graph.items():
-                i = int(node[1:])
-                for neighbor in neighbors:
-                    j = int(neighbor[1:])
-                    if i < j:
-                        candi_list.append((i, j))
-            # mcpe_costs contains mcpe of all the swaps in candi_list
-            mcpe_costs = {}
-            for swap in candi_list:
-                cost = calculate_mcpe_cost(swap, act_list, current_mapping, distances)
-                if cost > 0:
-                    mcpe_costs[swap] = cost
+            # Only swaps on an edge incident to a physical qubit of an active gate can change an
+            # active distance (any other swap has mcpe 0), so candidates are gathered from those
+            # qubits' incident edges; np.unique keeps them in candi_list order
+            front = {log2phys[gate.control] for gate in act_list} | {log2phys[gate.target] for gate in act_list}
+            relevant = np.unique(np.concatenate([incident[p] for p in front]))
+            
+            # mcpe_costs contains mcpe of the relevant swaps in candi_list
+            mcpe_costs = calculate_mcpe_costs(swap_perm[relevant], act_list, log2phys, distances)
+            if decay_delta:
+                # only positive scores can be chosen, and dividing keeps them positive
+                moved = np.asarray(phys2log)[ends[relevant]]
+                mcpe_costs = mcpe_costs / decay[moved].max(axis=1)
+            best = int(mcpe_costs.argmax()) if len(mcpe_costs) else None
             
-            if mcpe_costs:
-                best_swap = max(mcpe_costs.items(), key=lambda x: x[1])[0]
-                p1, p2 = best_swap
+            if best is not None and mcpe_costs[best] > 0:
+                p1, p2 = candi_list[relevant[best]]
                 
                 # Store SWAP operation with logical qubits
-                rev_mapping = get_reverse_mapping(current_mapping)
-                if p1 in rev_mapping and p2 in rev_mapping:
-                    operations.append(('swap', rev_mapping[p1], rev_mapping[p2]))
+                q1 = phys2log[p1]
+                q2 = phys2log[p2]
+                if q1 >= 0 and q2 >= 0:
+                    op_kind.append(1)
+                    op_q1.append(q1)
+                    op_q2.append(q2)
                 
-                # Update mapping implementing that swap
-                for q in current_mapping:
-                    if current_mapping[q] == p1:
-                        current_mapping[q] = p2
-                    elif current_mapping[q] == p2:
-                        current_mapping[q] = p1
-      if  not fron_list:
+                # Update mapping implementing that swap; only the qubits on p1 and p2 move
+                phys2log[p1], phys2log[p2] = q2, q1
+                if q1 >= 0:
+                    log2phys[q1] = p2
+                    decay[q1] += decay_delta
+                if q2 >= 0:
+                    log2phys[q2] = p1
+                    decay[q2] += decay_delta
+        # done once every dependence list is drained; fron_list can be empty while gates are still pending
+        if not any(dlist[q].head() for q in range(num_qubits)):
             break
     # Create final circuit with logical qubits
     final_logical_cir = QuantumCircuit(6)
-    for op_type, q1, q2 in operations:
-        if op_type == 'cx':
+    for kind, q1, q2 in zip(op_kind, op_q1, op_q2):
+        if kind == 0:
             final_logical_cir.cx(q1, q2)
         else:  # swap
             final_logical_cir.swap(q1, q2)
     
     return final_logical_cir
-#input coupling graph and initial mapping
-coupling_graph = {
-    'Q0': ['Q1','Q5'],
-    'Q1': ['Q0','Q2','Q6','Q7'],
-    'Q2': ['Q1','Q3','Q6','Q7'],
-    'Q3': ['Q2','Q4','Q8','Q9'],
-    'Q4': ['Q3','Q8','Q9'],
-    'Q5': ['Q0','Q6','Q10','Q11'],
-    'Q6': ['Q1','Q2','Q5','Q7','Q10','Q11'],
-    'Q7': ['Q1','Q2','Q6','Q8','Q12','Q13'],
-    'Q8': ['Q3','Q4','Q7','Q9','Q12','Q13'],
-    'Q9': ['Q3','Q4','Q8','Q14'],
-    'Q10': ['Q5','Q6','Q11','Q15'],
-    'Q11': ['Q5','Q6','Q10','Q12','Q16','Q17'],
-    'Q12': ['Q7','Q8','Q11','Q13','Q16','Q17'],
-    'Q13': ['Q7','Q8','Q12','Q14','Q18','Q19'],
-    'Q14': ['Q9','Q13','Q18','Q19'],
-    'Q15': ['Q10','Q16'],
-    'Q16': ['Q11','Q12','Q15','Q17'],
-    'Q17': ['Q11','Q12','Q16','Q18'],
-    'Q18': ['Q13','Q14','Q17','Q19'],
-    'Q19': ['Q13','Q14','Q18']
-}
+#input coupling graph (shared through topology.py) and initial mapping
+coupling_graph = COUPLING_GRAPH
 
 initial_mapping = {0: 1, 2: 6, 5: 2, 4: 7, 3: 0, 1: 5}  
 
@@ -0,0 +1,113 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import rustworkx as rx
+
+def qubit_id(label):
+    """
+    Extract the physical qubit id from a coupling graph label (e.g., 'Q7' -> 7)
+    """
+    return int(label[1:])
+
+@lru_cache(maxsize=None)
+def load(name='coupling.json'):
+    """
+    Read a coupling graph description (label -> neighbor labels) from a JSON file
+    stored next to this module. Each file is parsed once per process; the returned
+    dict is shared between callers and must not be modified.
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), 'r') as f:
+        return json.load(f)
+
+def analyze_graph(G):
+    """
+    Compute the all-pairs distance matrix of G once and derive the center nodes
+    (minimum eccentricity, as indices) and the diameter from it.
+    rx.distance_matrix reports unreachable pairs as 0, which would yield made-up
+    centers, so G must be connected.
+    """
+    if not rx.is_connected(G):
+        raise ValueError("Graph must be connected")
+    distances = rx.distance_matrix(G)
+    eccentricity = distances.max(axis=1)
+    return {
+        'distances': distances,
+        'centers': [int(node) for node in np.flatnonzero(eccentricity == eccentricity.min())],
+        'diameter': int(eccentricity.max())
+    }
+
+@lru_cache(maxsize=None)
+def _describe(coupling_items):
+    """
+    Cached worker for describe, keyed by a hashable copy of the adjacency description.
+    """
+    coupling_graph = dict(coupling_items)
+    labels = sorted(coupling_graph, key=qubit_id)
+    if [qubit_id(label) for label in labels] != list(range(len(labels))):
+        raise ValueError("Coupling graph qubits must be labelled Q0 to Q{N-1}")
+
+    # Every edge once as (i, j) with i < j, in the order the description lists them
+    edges = list(dict.fromkeys((min(i, j), max(i, j))
+                               for i, j in ((qubit_id(node), qubit_id(neighbor))
+                                            for node, neighbors in coupling_graph.items()
+                                            for neighbor in neighbors)))
+    adjacency = [set() for _ in labels]
+    for i, j in edges:
+        adjacency[i].add(j)
+        adjacency[j].add(i)
+
+    # Node index k is physical qubit k; its payload is the 'Qk' label
+    graph = rx.PyGraph(multigraph=False)
+    graph.add_nodes_from(labels)
+    graph.add_edges_from_no_data(edges)
+
+    # The compact distance matrix is int8, so reject diameters it cannot hold
+    analysis = analyze_graph(graph)
+    if analysis['diameter'] > np.iinfo(np.int8).max:
+        raise ValueError(f"Coupling graph diameter {analysis['diameter']} does not fit the int8 distance matrix")
+
+    # Shared through the cache, so freeze the arrays against accidental writes
+    distances = analysis['distances'].astype(np.int8)
+    # Row k maps every physical qubit to where it sits after swapping along edges[k]
+    swap_perm = np.tile(np.arange(len(labels), dtype=np.int16), (len(edges), 1))
+    rows = np.arange(len(edges))
+    ends = np.array(edges, dtype=np.int16).reshape(-1, 2)
+    swap_perm[rows, ends[:, 0]] = ends[:, 1]
+    swap_perm[rows, ends[:, 1]] = ends[:, 0]
+    # Indices into edges of the edges touching each physical qubit, ascending
+    incident = [[] for _ in labels]
+    for k, (i, j) in enumerate(edges):
+        incident[i].append(k)
+        incident[j].append(k)
+    incident = [np.array(ks, dtype=np.intp) for ks in incident]
+    for array in (distances, swap_perm, *incident):
+        array.flags.writeable = False
+
+    return {
+        'graph': graph,
+        'adjacency': tuple(frozenset(neighbors) for neighbors in adjacency),
+        'edges': tuple(edges),
+        # (K, N) int16 permutation per edge, so scoring a swap is a single gather
+        'swap_perm': swap_perm,
+        'incident': tuple(incident),
+        'distances': distances,
+        'centers': analysis['centers'],
+        'diameter': analysis['diameter']
+    }
+
+def describe(coupling_graph):
+    """
+    Precompute everything derived from a coupling graph description: the rustworkx
+    graph, integer adjacency sets, edge list (also as swap permutations and
+    per-qubit incident edge indices), int8 distance matrix and centers.
+    Results are cached per topology, so the shortest paths of a device are computed
+    once however many circuits are mapped onto it. The returned dict and its contents
+    are shared between callers and must not be modified.
+    """
+    return _describe(tuple((node, tuple(neighbors)) for node, neighbors in coupling_graph.items()))
+
+# The bundled hardware topology, precomputed once at import time
+COUPLING_GRAPH = load('coupling.json')
+DIST = describe(COUPLING_GRAPH)['distances']
@@ -1,65 +1,110 @@
 from qiskit import QuantumCircuit
 import networkx as nx
+import numpy as np
+import rustworkx as rx
 from typing import List, Dict, Tuple, Optional, Set
 from collections import defaultdict
-import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Optimizers created with verbose=True report through this child logger, which always prints
+# its messages, whatever level or handlers the application configures
+verbose_logger = logger.getChild("verbose")
+verbose_logger.setLevel(logging.DEBUG)
+verbose_logger.propagate = False
+_verbose_handler = logging.StreamHandler()
+_verbose_handler.setFormatter(logging.Formatter("%(message)s"))
+verbose_logger.addHandler(_verbose_handler)
 
 class MCPEOptimizer:
-    def __init__(self, coupling_graph: nx.Graph):
+    def __init__(self, coupling_graph: nx.Graph, verbose: bool = False, decay_delta: float = 0.001,
+                 directed_edges: Optional[Set[Tuple[int, int]]] = None):
         self.coupling_graph = coupling_graph
-        self.dist_matrix = dict(nx.all_pairs_shortest_path_length(coupling_graph))
-        self.front_list = []  # List of frontier gates
-        self.act_list = []    # List of active gates
+        self.verbose = verbose
+        self.decay_delta = decay_delta
+        self._edges = list(coupling_graph.edges())
+        # Dense distance matrix indexed by physical qubit, computed natively by rustworkx on a copy of
+        # the graph whose node index k is physical qubit k. Device diameters are small, so it is int8
+        # unless a distance needs int16; unreachable pairs hold the dtype's maximum (self._unreachable)
+        if not all(isinstance(node, (int, np.integer)) and node >= 0 for node in coupling_graph.nodes):
+            raise ValueError("Coupling graph nodes must be non-negative integer physical qubit indices")
+        n_phys = max(coupling_graph.nodes, default=-1) + 1
+        rx_graph = rx.PyGraph()
+        rx_graph.add_nodes_from(range(n_phys))
+        rx_graph.add_edges_from_no_data(self._edges)
+        distances = rx.distance_matrix(rx_graph, null_value=np.inf)
+        dtype = np.int8 if distances[np.isfinite(distances)].max(initial=0) < np.iinfo(np.int8).max else np.int16
+        self._unreachable = int(np.iinfo(dtype).max)
+        distances[np.isinf(distances)] = self._unreachable
+        self.dist_matrix = distances.astype(dtype)
+        # Row lists of the same distances: scalar lookups from Python loops avoid NumPy indexing overhead
+        self._dist_rows = self.dist_matrix.tolist()
+        # Next-hop table: _next_hop[u][v] is the neighbor of u that starts a shortest path to v
+        # (-1 where v is u or unreachable), so a path is walked hop by hop without a BFS
+        next_hop = np.full((n_phys, n_phys), -1, dtype=np.int16 if n_phys <= np.iinfo(np.int16).max else np.int32)
+        for u in range(n_phys):
+            for w in sorted(rx_graph.neighbors(u)):
+                closer = (self.dist_matrix[w] == self.dist_matrix[u] - 1) & (next_hop[u] < 0)
+                next_hop[u, closer] = w
+        self._next_hop = next_hop.tolist()
+        # (control, target) pairs the hardware runs natively; None means every coupling works
+        # in both directions and a CX is never reversed
+        self.directed_edges = None if directed_edges is None else frozenset(directed_edges)
+        # Indices into self._edges of the edges touching each physical qubit
+        self._incident = defaultdict(list)
+        for i, (p1, p2) in enumerate(self._edges):
+            self._incident[p1].append(i)
+            self._incident[p2].append(i)
+        self.front_list = set()  # Indices (into the circuit's instructions) of frontier gates
+        self.act_list = set()    # Indices of active gates
         self.frozen = {}      # Dictionary to track frozen qubits
+        self.decay = []       # SABRE-style swap penalty per logical qubit, reset when a gate executes
         
     def calculate_dist(self, p1: int, p2: int) -> int:
         """Calculate the nearest neighbor distance between two physical qubits."""
-        return self.dist_matrix[p1][p2]
+        return int(self.dist_matrix[p1, p2])
     
     def initialize_lists(self, circuit_data: List):
         """Initialize front_list and frozen states."""
-        self.front_list = []
-        self.act_list = []
+        self.front_list = set()
+        self.act_list = set()
         self.frozen = {i: False for i in range(len(circuit_data))}
         
         # Add first gate to front_list
         if circuit_data:
-            self.front_list.append(circuit_data[0])
+            self.front_list.add(0)
     
     def update_lists(self, executed_gate_idx: int, circuit_data: List):
         """Update front_list and act_list after gate execution."""
-        # Remove executed gate from lists
+        # Remove executed gate from lists (gates are tracked by their index in circuit_data)
         if executed_gate_idx < len(circuit_data):
-            gate = circuit_data[executed_gate_idx]
-            if gate in self.front_list:
-                self.front_list.remove(gate)
-            if gate in self.act_list:
-                self.act_list.remove(gate)
+            self.front_list.discard(executed_gate_idx)
+            self.act_list.discard(executed_gate_idx)
             
             # Add next gate to front_list if exists
             if executed_gate_idx + 1 < len(circuit_data):
-                next_gate = circuit_data[executed_gate_idx + 1]
-                if next_gate not in self.front_list:
-                    self.front_list.append(next_gate)
+                self.front_list.add(executed_gate_idx + 1)
     
     def calculate_mcpe(self, circuit_slice: List[Tuple[int, int]], swap_qubits: Tuple[int, int], 
-                      current_mapping: Dict[int, int]) -> float:
+                      current_mapping: List[int],
+                      swap_phys: Optional[Tuple[int, int]] = None) -> float:
         """Calculate MCPE value for a potential SWAP."""
         q1, q2 = swap_qubits
         mcpe_value = 0
         
-        # Create new mapping after potential swap
-        new_mapping = current_mapping.copy()
-        new_mapping[q1], new_mapping[q2] = new_mapping[q2], new_mapping[q1]
+        # The swap only exchanges the physical qubits p1 and p2, so substitute them per gate.
+        # swap_phys gives them directly when one side of the SWAP is an empty physical qubit
+        # (None in swap_qubits)
+        p1, p2 = swap_phys if swap_phys is not None else (current_mapping[q1], current_mapping[q2])
+        swapped = {p1: p2, p2: p1}
         
         # Calculate effect on each gate in look-ahead window
-        for idx, (control, target) in enumerate(circuit_slice):
-            old_dist = self.calculate_dist(current_mapping[control], current_mapping[target])
-            new_dist = self.calculate_dist(new_mapping[control], new_mapping[target])
-            effect = (old_dist - new_dist)
-            if effect > 0:
-                effect = 1
-            mcpe_value += effect
+        dist = self._dist_rows
+        for control, target in circuit_slice:
+            pc, pt = current_mapping[control], current_mapping[target]
+            # A gate brought closer counts once; one pushed apart costs its full distance increase
+            mcpe_value += min(dist[pc][pt] - dist[swapped.get(pc, pc)][swapped.get(pt, pt)], 1)
             
             if mcpe_value <= 0:
                 break
@@ -71,118 +116,229 @@ class MCPEOptimizer:
         affected_gates = []
         q1, q2 = swap_qubits
         
-        for inst in circuit_data[start_idx:]:
-            if len(inst.qubits) == 2:
-                control = inst.qubits[0]._index
-                target = inst.qubits[1]._index
+        for idx in range(start_idx, len(circuit_data)):
+            qubits = circuit_data[idx][1]
+            if len(qubits) == 2:
+                control, target = qubits
                 if control in (q1, q2) or target in (q1, q2):
                     affected_gates.append((control, target))
-                    
-                if control not in (q1, q2) and target not in (q1, q2):
+                else:
                     break
                     
         return affected_gates
     
     def find_best_swap(self, circuit_data: List, current_idx: int, 
-                      current_mapping: Dict[int, int]) -> Optional[Tuple[int, int]]:
-        """Find the best SWAP operation using MCPE heuristic."""
+                      current_mapping: List[int],
+                      reverse_map: Optional[List[Optional[int]]] = None,
+                      decay: Optional[List[float]] = None) -> Optional[Tuple[int, int]]:
+        """Find the best SWAP operation using MCPE heuristic, as the coupling graph edge
+        (pair of physical qubits) to swap; one of them may be empty."""
         best_swap = None
         best_mcpe = float('-inf')
         
-        # Get all possible SWAP candidates from coupling graph
-        swap_candidates = list(self.coupling_graph.edges())
+        # Physical -> logical lookup (None for an empty physical qubit), built once per call
+        # unless the caller keeps one up to date
+        if reverse_map is None:
+            reverse_map = [None] * len(self._dist_rows)
+            for q, p in enumerate(current_mapping):
+                if p is not None:
+                    reverse_map[p] = q
+        
+        # get_affected_gates stops at the first 2-qubit gate not on the SWAP, so a SWAP
+        # can only score if it moves a qubit of the first 2-qubit gate (the front gate)
+        for idx in range(current_idx, len(circuit_data)):
+            front_gate = circuit_data[idx][1]
+            if len(front_gate) == 2:
+                break
+        else:
+            return None
+        pc, pt = current_mapping[front_gate[0]], current_mapping[front_gate[1]]
+        dist = self._dist_rows
+        
+        # SWAP candidates: the edges incident to the front gate's physical qubits, kept in
+        # coupling graph edge order so ties resolve as they would over the full edge list
+        swap_candidates = [self._edges[i] for i in sorted(set(self._incident[pc]) | set(self._incident[pt]))]
         
         for edge in swap_candidates:
-            # Get logical qubits for this edge
-            reverse_map = {v: k for k, v in current_mapping.items()}
+            # Get logical qubits for this edge; moving a qubit into an empty physical qubit
+            # (None) is a valid SWAP too
             q1 = reverse_map[edge[0]]
             q2 = reverse_map[edge[1]]
             
-            # Get affected gates for this SWAP
-            affected_gates = self.get_affected_gates(circuit_data, current_idx, (q1, q2))
-            
-            if affected_gates:
-                # Calculate MCPE value
-                mcpe = self.calculate_mcpe(affected_gates, (q1, q2), current_mapping)
+            # The front gate is the first affected gate. Unless this SWAP brings it closer,
+            # calculate_mcpe stops right after it, so the MCPE is just that non-positive change
+            # and the rest of the window need not be collected
+            e0, e1 = edge
+            new_pc = e1 if pc == e0 else e0 if pc == e1 else pc
+            new_pt = e1 if pt == e0 else e0 if pt == e1 else pt
+            front_delta = dist[pc][pt] - dist[new_pc][new_pt]
+            if front_delta > 0:
+                # Get affected gates for this SWAP
+                affected_gates = self.get_affected_gates(circuit_data, current_idx, (q1, q2))
                 
-                # Update best SWAP if this one is better
-                if mcpe > best_mcpe:
-                    best_mcpe = mcpe
-                    best_swap = (q1, q2)
+                # Each gate adds at most 1 to the MCPE, so a SWAP with no more affected
+                # gates than best_mcpe cannot beat it
+                if len(affected_gates) <= best_mcpe:
+                    continue
+                # Calculate MCPE value
+                mcpe = self.calculate_mcpe(affected_gates, (q1, q2), current_mapping, edge)
+            else:
+                mcpe = front_delta
+            
+            # Penalize SWAPs on recently swapped qubits so the router does not oscillate
+            # (only while routing, when the caller passes its per-logical-qubit decay)
+            if decay is not None and self.decay_delta:
+                penalty = max(decay[q] for q in (q1, q2) if q is not None)
+                mcpe = mcpe / penalty if mcpe > 0 else mcpe * penalty
+            
+            # Update best SWAP if this one is better
+            if mcpe > best_mcpe:
+                best_mcpe = mcpe
+                best_swap = edge
         
         return best_swap
 
     def optimize_circuit(self, circuit: QuantumCircuit, initial_mapping: Dict[int, int]) -> Tuple[QuantumCircuit, Dict[int, int]]:
         """Optimize circuit using MCPE-based SWAP insertion."""
-        current_mapping = initial_mapping.copy()
-        n_qubits = len(initial_mapping)
-        new_circuit = QuantumCircuit(n_qubits)
+        # l2p[q]: physical qubit of logical qubit q, p2l[p]: logical qubit on physical qubit p
+        # (None where unmapped); both are updated in place on every SWAP
+        n_logical = max(circuit.num_qubits, max(initial_mapping, default=-1) + 1)
+        l2p = [None] * n_logical
+        p2l = [None] * len(self._dist_rows)
+        for q, p in initial_mapping.items():
+            l2p[q] = p
+            p2l[p] = q
+        self.decay = [1.0] * n_logical
+        decayed = False  # Whether a SWAP has raised self.decay since it was last reset
+        # Sized by the device: SWAPs and gates may land on physical qubits the mapping leaves empty
+        new_circuit = QuantumCircuit(len(self._dist_rows))
         
-        print("\nStarting MCPE-based circuit optimization...")
+        # Checked once per call so the hot loop skips the logging calls entirely unless this
+        # optimizer is verbose or DEBUG is on
+        log = verbose_logger if self.verbose else logger
+        debug = log.isEnabledFor(logging.DEBUG)
+        log.debug("Starting MCPE-based circuit optimization...")
+        
+        # Resolve every instruction's qubits to integer indices once: (operation, qubit indices)
+        circuit_data = [(inst.operation, tuple(circuit.find_bit(q).index for q in inst.qubits))
+                        for inst in circuit.data]
+        unmapped = sorted({q for _, qubits in circuit_data for q in qubits if l2p[q] is None})
+        if unmapped:
+            raise ValueError(f"Initial mapping does not place circuit qubits {unmapped}")
         
         # Initialize lists and frozen states
-        self.initialize_lists(circuit.data)
+        self.initialize_lists(circuit_data)
         
+        dist = self._dist_rows
         idx = 0
-        while idx < len(circuit.data):
-            instruction = circuit.data[idx]
-            operation = instruction.operation
-            qubits = instruction.qubits
+        while idx < len(circuit_data):
+            operation, qubits = circuit_data[idx]
             
-            print(f"\nProcessing gate {idx}: {operation.name} on qubits {[q._index for q in qubits]}")
+            if debug:
+                log.debug("Processing gate %d: %s on qubits %s", idx, operation.name, list(qubits))
             
             if len(qubits) == 2:
-                control = qubits[0]._index
-                target = qubits[1]._index
-                mapped_control = current_mapping[control]
-                mapped_target = current_mapping[target]
+                control, target = qubits
+                mapped_control = l2p[control]
+                mapped_target = l2p[target]
                 
-                print(f"Mapped qubits: control={mapped_control}, target={mapped_target}")
+                if debug:
+                    log.debug("Mapped qubits: control=%d, target=%d", mapped_control, mapped_target)
                 
-                # Check if qubits are adjacent
-                if not self.coupling_graph.has_edge(mapped_control, mapped_target):
-                    print("Qubits not adjacent, searching for SWAP...")
+                # Check if qubits are adjacent (coupled qubits are exactly those at distance 1)
+                adjacent = dist[mapped_control][mapped_target] == 1
+                if not adjacent:
+                    if debug:
+                        log.debug("Qubits not adjacent, searching for SWAP...")
                     # Find best SWAP
-                    best_swap = self.find_best_swap(circuit.data, idx, current_mapping)
+                    best_swap = self.find_best_swap(circuit_data, idx, l2p, p2l, self.decay)
                     
                     if best_swap:
-                        q1, q2 = best_swap
-                        phys_q1 = current_mapping[q1]
-                        phys_q2 = current_mapping[q2]
-                        
-                        # Add SWAP gate
+                        phys_q1, phys_q2 = best_swap
+                        swapped = {phys_q1: phys_q2, phys_q2: phys_q1}
+                        if (dist[swapped.get(mapped_control, mapped_control)][swapped.get(mapped_target, mapped_target)]
+                                < dist[mapped_control][mapped_target]):
+                            # Add SWAP gate
+                            q1, q2 = p2l[phys_q1], p2l[phys_q2]
+                            new_circuit.swap(phys_q1, phys_q2)
+                            p2l[phys_q1], p2l[phys_q2] = q2, q1
+                            for q, phys in ((q1, phys_q2), (q2, phys_q1)):
+                                if q is not None:
+                                    l2p[q] = phys
+                                    self.decay[q] += self.decay_delta
+                            decayed = True
+                            if debug:
+                                log.debug("Applied SWAP %s, new mapping: %s", (q1, q2), l2p)
+                            
+                            # Don't increment idx as we need to retry the current gate
+                            continue
+                    
+                    # No SWAP brings the gate closer, so retrying could cycle forever: move the
+                    # control next to the target along a shortest path, all SWAPs in one step
+                    if dist[mapped_control][mapped_target] == self._unreachable:
+                        raise ValueError(f"Physical qubits {mapped_control} and {mapped_target} are not connected")
+                    path = [mapped_control]
+                    while path[-1] != mapped_target:
+                        path.append(self._next_hop[path[-1]][mapped_target])
+                    for phys_q1, phys_q2 in zip(path[:-2], path[1:-1]):
+                        q1, q2 = p2l[phys_q1], p2l[phys_q2]
                         new_circuit.swap(phys_q1, phys_q2)
-                        current_mapping[q1], current_mapping[q2] = current_mapping[q2], current_mapping[q1]
-                        print(f"Applied SWAP {best_swap}, new mapping: {current_mapping}")
-                        
-                        # Don't increment idx as we need to retry the current gate
-                        continue
+                        p2l[phys_q1], p2l[phys_q2] = q2, q1
+                        if q1 is not None:
+                            l2p[q1] = phys_q2
+                        if q2 is not None:
+                            l2p[q2] = phys_q1
+                    mapped_control = path[-2]
+                    adjacent = True
+                    if debug:
+                        log.debug("Applied %d SWAPs along %s, new mapping: %s", len(path) - 2, path, l2p)
                 
-                # Try to apply the gate
-                if self.coupling_graph.has_edge(mapped_control, mapped_target):
-                    new_circuit.append(operation, [mapped_control, mapped_target])
-                    print(f"Added gate {operation.name} between {mapped_control} and {mapped_target}")
-                elif self.coupling_graph.has_edge(mapped_target, mapped_control):
-                    if operation.name == 'cx':
+                # Try to apply the gate, reversing a CX whose direction is not native
+                if adjacent:
+                    if self.directed_edges is None or (mapped_control, mapped_target) in self.directed_edges:
+                        new_circuit.append(operation, [mapped_control, mapped_target])
+                        if debug:
+                            log.debug("Added gate %s between %d and %d", operation.name, mapped_control, mapped_target)
+                    elif operation.name == 'cx':
                         new_circuit.h(mapped_control)
                         new_circuit.h(mapped_target)
                         new_circuit.cx(mapped_target, mapped_control)
                         new_circuit.h(mapped_control)
                         new_circuit.h(mapped_target)
-                        print(f"Added reversed {operation.name} between {mapped_target} and {mapped_control}")
+                        if debug:
+                            log.debug("Added reversed %s between %d and %d", operation.name, mapped_target, mapped_control)
                     else:
                         raise ValueError(f"Unsupported gate {operation.name} for reverse implementation")
+                if decayed:
+                    self.decay = [1.0] * n_logical
+                    decayed = False
             else:
                 # Single-qubit gate
-                qubit = qubits[0]._index
-                mapped_qubit = current_mapping[qubit]
+                qubit = qubits[0]
+                mapped_qubit = l2p[qubit]
                 new_circuit.append(operation, [mapped_qubit])
-                print(f"Added single-qubit gate {operation.name} on {mapped_qubit}")
+                if debug:
+                    log.debug("Added single-qubit gate %s on %d", operation.name, mapped_qubit)
             
-            self.update_lists(idx, circuit.data)
+            self.update_lists(idx, circuit_data)
             idx += 1
         
-        return new_circuit, current_mapping
+        return new_circuit, {q: l2p[q] for q in initial_mapping}
+
+    def refine_initial_mapping(self, circuit: QuantumCircuit, initial_mapping: Dict[int, int],
+                               iters: int = 3) -> Dict[int, int]:
+        """Refine an initial mapping with SABRE-style forward and backward routing passes."""
+        # Routing the reversed circuit from the forward pass's final mapping yields a
+        # starting mapping that suits the beginning of the circuit better than the input one
+        reversed_circuit = circuit.copy_empty_like()
+        for instruction in reversed(circuit.data):
+            reversed_circuit.append(instruction)
+        
+        mapping = initial_mapping.copy()
+        for _ in range(iters):
+            _, mapping = self.optimize_circuit(circuit, mapping)
+            _, mapping = self.optimize_circuit(reversed_circuit, mapping)
+        return mapping
 
 def main():
     # Create the coupling graph
@@ -219,7 +375,7 @@ def main():
     print("Initial mapping:", initial_mapping)
     
     # Optimize circuit using MCPE
-    optimizer = MCPEOptimizer(coupling_graph)
+    optimizer = MCPEOptimizer(coupling_graph, verbose=True)
     optimized_circuit, final_mapping = optimizer.optimize_circuit(circuit, initial_mapping)
     
     print("\nFinal Results:")